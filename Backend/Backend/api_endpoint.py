@@ -10,12 +10,17 @@ This is the main API endpoint that your React Native app will call.
 Now integrated with the Orchestrator for full pipeline processing.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+
+from anyio import to_thread
 from fastapi import FastAPI, HTTPException, File, UploadFile, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict
-import re
-import json
+from typing import Optional, List, Dict, Mapping, Iterator
 
 from rule_engine import (
     UserFinancialProfile,
@@ -29,8 +34,32 @@ from llm_service import (
     ConversationMessage
 )
 from orchestrator import Orchestrator, PipelineStage
+# NLU lives in nlu_service; re-exported here for existing imports
+from nlu_service import extract_financial_data, detect_intent
+
+THREADPOOL_SIZE = 100  # Concurrent blocking pipeline runs (anyio default is 40)
+MAX_AUDIO_BYTES = 25 * 1024 * 1024  # Largest accepted /chat/audio upload
+AUDIO_CHUNK_SIZE = 64 * 1024  # Read size when streaming uploads
+
+# Accepted /eligibility/check loan types: enum values ("home_loan") and bare names ("home")
+_LOAN_TYPE_ALIASES: Mapping[str, LoanType] = MappingProxyType({
+    **{loan_type.value: loan_type for loan_type in LoanType},
+    **{loan_type.name.lower(): loan_type for loan_type in LoanType},
+})
 
-app = FastAPI(title="Multilingual AI Loan Advisor API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the threadpool that runs the blocking pipeline (Gemini I/O, Whisper)"""
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
+
+app = FastAPI(
+    title="Multilingual AI Loan Advisor API",
+    default_response_class=ORJSONResponse,  # orjson: faster response serialization
+    lifespan=lifespan
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -92,475 +121,103 @@ class EligibilityCheckRequest(BaseModel):
     existing_loans_emi: float = 0.0
     existing_credit_cards_min_payment: float = 0.0
 
-def extract_loan_amount(text: str) -> Optional[float]:
-    """
-    Extract loan amount from text using improved regex patterns
-    
-    Priority: Look for loan-specific keywords first to avoid confusion with income
-    Examples:
-        "I need 5 lakh loan" -> 500000
-        "loan of ₹500000" -> 500000
-        "5 lacs for loan" -> 500000
-    """
-    text = text.replace(",", "")
-    text_lower = text.lower()
-    
-    loan_lakh_pattern = r"loan.*?(\d+(?:\.\d+)?)\s*(?:lakh|lac|l)(?:s)?\b"
-    match = re.search(loan_lakh_pattern, text_lower)
-    if match:
-        return float(match.group(1)) * 100000
-    lakh_loan_pattern = r"(\d+(?:\.\d+)?)\s*(?:lakh|lac|l)(?:s)?\s*(?:loan|for|of)"
-    match = re.search(lakh_loan_pattern, text_lower)
-    if match:
-        return float(match.group(1)) * 100000
-    
-    loan_crore_pattern = r"loan.*?(\d+(?:\.\d+)?)\s*(?:crore|cr)(?:s)?\b"
-    match = re.search(loan_crore_pattern, text_lower)
-    if match:
-        return float(match.group(1)) * 10000000
-    
-    crore_loan_pattern = r"(\d+(?:\.\d+)?)\s*(?:crore|cr)(?:s)?\s*(?:loan|for|of)"
-    match = re.search(crore_loan_pattern, text_lower)
-    if match:
-        return float(match.group(1)) * 10000000
-    
-    loan_currency_pattern = r"loan.*?(?:of|for|amount)?\s*(?:₹|rupees?|rs\.?)\s*(\d+(?:\.\d+)?)"
-    match = re.search(loan_currency_pattern, text_lower)
-    if match:
-        return float(match.group(1))
-    
-    loan_for_lakh_pattern = r"loan.*?for.*?(\d+(?:\.\d+)?)\s*(?:lakh|lac|l)(?:s)?\b"
-    match = re.search(loan_for_lakh_pattern, text_lower)
-    if match:
-        return float(match.group(1)) * 100000
-    
-    loan_for_crore_pattern = r"loan.*?for.*?(\d+(?:\.\d+)?)\s*(?:crore|cr)(?:s)?\b"
-    match = re.search(loan_for_crore_pattern, text_lower)
-    if match:
-        return float(match.group(1)) * 10000000
-    
-    of_lakh_pattern = r"of\s+(\d+(?:\.\d+)?)\s*(?:lakh|lac|l)(?:s)?\b"
-    match = re.search(of_lakh_pattern, text_lower)
-    if match:
-        match_start = match.start()
-        context_before = text_lower[max(0, match_start-30):match_start]
-        if "loan" in context_before:
-            return float(match.group(1)) * 100000
-    
-    for_crore_pattern = r"for\s+.*?(\d+(?:\.\d+)?)\s*(?:crore|cr)(?:s)?\b"
-    match = re.search(for_crore_pattern, text_lower)
-    if match:
-        match_start = match.start()
-        context_before = text_lower[max(0, match_start-50):match_start]
-        if "loan" in context_before:
-            return float(match.group(1)) * 10000000
-    
-    if "income" not in text_lower and "salary" not in text_lower and "earning" not in text_lower:
-        lakh_pattern = r"(\d+(?:\.\d+)?)\s*(?:lakh|lac|l)(?:s)?\b"
-        match = re.search(lakh_pattern, text_lower)
-        if match:
-            match_start = match.start()
-            context_before = text_lower[max(0, match_start-50):match_start]
-            context_after = text_lower[match.end():min(len(text_lower), match.end()+20)]
-            loan_keywords = ["loan", "for", "of", "want", "need", "looking", "borrow"]
-            if any(word in context_before or word in context_after for word in loan_keywords):
-                return float(match.group(1)) * 100000
-            elif 1 <= float(match.group(1)) <= 100:
-                return float(match.group(1)) * 100000
-        
-        crore_pattern = r"(\d+(?:\.\d+)?)\s*(?:crore|cr)(?:s)?\b"
-        match = re.search(crore_pattern, text_lower)
-        if match:
-            match_start = match.start()
-            context_before = text_lower[max(0, match_start-50):match_start]
-            context_after = text_lower[match.end():min(len(text_lower), match.end()+20)]
-            
-            loan_keywords = ["loan", "for", "of", "want", "need", "looking", "borrow"]
-            if any(word in context_before or word in context_after for word in loan_keywords):
-                return float(match.group(1)) * 10000000
-            elif 1 <= float(match.group(1)) <= 10:
-                return float(match.group(1)) * 10000000
-    
-    if "loan" in text_lower:
-        large_number_pattern = r"\b(\d{5,})\b"
-        matches = re.findall(large_number_pattern, text)
-        for match_str in matches:
-            num = float(match_str)
-            if 100000 <= num <= 100000000:  
-                return num
-    
-    return None
 
+MAX_BATCH_SIZE = 20  # Max messages per /chat/batch request
 
-def extract_income(text: str) -> Optional[float]:
-    """
-    Extract monthly income from text with improved patterns
-    
-    Priority: Look for income-specific keywords to avoid confusion with loan amounts
-    """
-    text = text.replace(",", "")
-    text_lower = text.lower()
-    monthly_pattern = r"(\d+(?:\.\d+)?)\s*(?:k|thousand)?\s*(?:per month|monthly|pm)"
-    income_k_pattern = r"(?:income|salary|earning|earn|make|get).*?(\d+(?:\.\d+)?)\s*k\b"
-    match = re.search(income_k_pattern, text_lower)
-    if match:
-        return float(match.group(1)) * 1000
-    k_income_pattern = r"(\d+(?:\.\d+)?)\s*k\s*(?:income|salary|per month|monthly)"
-    match = re.search(k_income_pattern, text_lower)
-    if match:
-        return float(match.group(1)) * 1000
-    income_currency_pattern = r"(?:income|salary|earning|earn|make|get).*?(?:is|of|₹|rupees?|rs\.?)\s*(\d+(?:\.\d+)?)"
-    match = re.search(income_currency_pattern, text_lower)
-    if match:
-        num = float(match.group(1))
-        if 10000 <= num <= 1000000:
-            return num
-    match = re.search(monthly_pattern, text_lower)
-    if match:
-        num_str = match.group(1)
-        if "k" in text_lower[max(0, match.start()-5):match.end()]:
-            return float(num_str) * 1000
-        else:
-            num = float(num_str)
-            if 10000 <= num <= 1000000:
-                return num
-    
-    if "loan" not in text_lower and "borrow" not in text_lower:
-        k_pattern = r"(\d+(?:\.\d+)?)\s*k\b"
-        match = re.search(k_pattern, text_lower)
-        if match:
-            return float(match.group(1)) * 1000
-    
-    if "income" in text_lower or "salary" in text_lower or "earning" in text_lower:
-        medium_number_pattern = r"\b(\d{4,6})\b"
-        matches = re.findall(medium_number_pattern, text)
-        for match_str in matches:
-            num = float(match_str)
-            if 10000 <= num <= 500000:  
-                return num
-    
-    return None
+# (session_id, message, user_language) -> pipeline run in flight
+_inflight_chats: Dict[tuple, asyncio.Task] = {}
 
 
-def extract_tenure(text: str) -> Optional[int]:
+def _build_chat_response(pipeline_response: Dict, session_id: str) -> ChatResponse:
     """
-    Extract loan tenure in years
-    
-    Avoids confusion with age by looking for loan-specific context
-    """
-    text_lower = text.lower()
-    
-    loan_tenure_patterns = [
-        r"loan.*?(?:for|of|with|tenure).*?(\d+)\s*(?:years?|yrs?|y)\b",
-        r"tenure.*?(\d+)\s*(?:years?|yrs?|yrs?)\b",
-        r"repay.*?(?:in|for|over).*?(\d+)\s*(?:years?|yrs?)\b",
-        r"(\d+)\s*(?:years?|yrs?)\s*(?:loan|tenure|repayment)"
-    ]
-    
-    for pattern in loan_tenure_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            years = int(match.group(1))
-            if 1 <= years <= 30:  
-                return years
-    
-    loan_month_patterns = [
-        r"loan.*?(?:for|of|with).*?(\d+)\s*(?:months?|mon)\b",
-        r"tenure.*?(\d+)\s*(?:months?|mon)\b"
-    ]
+    Map an orchestrator pipeline response onto the API response model
     
-    for pattern in loan_month_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            months = int(match.group(1))
-            if 12 <= months <= 360:  
-                return months // 12
-    
-    year_pattern = r"(\d+)\s*(?:years?|yrs?|y)\b"
-    matches = list(re.finditer(year_pattern, text_lower))
-    
-    for match in matches:
-        years = int(match.group(1))
-        start = max(0, match.start() - 15)
-        end = min(len(text_lower), match.end() + 15)
-        context = text_lower[start:end]
-        
-        if any(phrase in context for phrase in ["age", "aged", " am ", "years old", "yrs old"]):
-            continue  
-        
-        if any(word in context for word in ["loan", "tenure", "repay", "emi", "for", "of"]):
-            if 1 <= years <= 30:
-                return years
-    
-    month_pattern = r"(\d+)\s*(?:months?|mon)\b"
-    match = re.search(month_pattern, text_lower)
-    if match:
-        months = int(match.group(1))
-        if 12 <= months <= 360:  
-            return months // 12
-    
-    return None
-
-
-def extract_age(text: str) -> Optional[int]:
-    """
-    Extract age from text
-    Prioritizes age-specific patterns to avoid confusion with employment duration
+    The values come from our own pipeline, so the model is built with
+    model_construct (no validation); FastAPI still checks the returned
+    object against response_model when it serializes it.
     """
-    text_lower = text.lower()
-    
-    age_patterns = [
-        r"(?:age|aged)\s*(?:is|of)?\s*(\d{1,3})\b",
-        r"am\s+(\d{1,3})\s+(?:years?\s+)?old\b",
-        r"(\d{1,3})\s+years?\s+old\b",
-        r"(\d{1,3})\s+years?\s+of\s+age\b"
-    ]
-    
-    for pattern in age_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            age = int(match.group(1))
-            if 18 <= age <= 100:  
-                return age
-    
-    return None
-
-
-def extract_loan_type(text: str) -> Optional[LoanType]:
-    """
-    Extract loan type from text with improved pattern matching
-    
-    Priority order: specific loan types first, then generic keywords
-    """
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ["business loan", "business", "commercial loan", "startup loan"]):
-        return LoanType.BUSINESS
-    
-    if any(word in text_lower for word in ["education loan", "student loan", "study loan", "education", "student"]):
-        return LoanType.EDUCATION
-    
-    if any(word in text_lower for word in ["car loan", "vehicle loan", "auto loan", "car", "vehicle", "auto"]):
-        return LoanType.CAR
-    
-    if any(word in text_lower for word in ["home loan", "housing loan", "house loan", "home", "house", "housing"]):
-        return LoanType.HOME
-    
-    if any(word in text_lower for word in ["personal loan", "personal", "unsecured loan"]):
-        return LoanType.PERSONAL
-    
-    return None
-
-
-def extract_existing_loans_emi(text: str) -> Optional[float]:
-    """
-    Extract existing loans EMI from text
-    Examples: "I pay 5000 EMI", "existing loan EMI is 10000", "current EMI 15000"
-    """
-    text_lower = text.lower()
-    patterns = [
-        r"(?:existing|current|old|previous).*?(?:loan|emi).*?(?:is|of|₹|rupees?|rs\.?)\s*(\d+(?:\.\d+)?)",
-        r"(?:loan|emi).*?(?:existing|current|old|previous).*?(?:is|of|₹|rupees?|rs\.?)\s*(\d+(?:\.\d+)?)",
-        r"(?:pay|paying|have|have a).*?(\d+(?:\.\d+)?)\s*(?:per month|monthly|pm|emi)",
-        r"emi.*?(?:is|of|₹|rupees?|rs\.?)\s*(\d+(?:\.\d+)?)",
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            num = float(match.group(1))
-            if 1000 <= num <= 500000:
-                return num
-    
-    return None
-def extract_credit_card_payment(text: str) -> Optional[float]:
-    """
-    Extract credit card minimum payment from text
-    Examples: "credit card payment 5000", "card payment is 10000"
-    """
-    text_lower = text.lower()
-    patterns = [
-        r"(?:credit card|card).*?(?:payment|minimum|min).*?(?:is|of|₹|rupees?|rs\.?)\s*(\d+(?:\.\d+)?)",
-        r"(?:credit card|card).*?(\d+(?:\.\d+)?)\s*(?:per month|monthly|pm)",
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            num = float(match.group(1))
-            if 500 <= num <= 100000:
-                return num
-    
-    return None
+    extracted_data = pipeline_response.get("extracted_data", {})
+    eligibility_result = pipeline_response.get("eligibility_result")
+    missing_info = pipeline_response.get("missing_info", [])
+    
+    return ChatResponse.model_construct(
+        response=pipeline_response.get("response", "No response generated"),
+        session_id=session_id,
+        extracted_data=extracted_data if extracted_data else None,
+        eligibility_result=eligibility_result,
+        # Eligibility is only calculated once we have enough info
+        needs_clarification=eligibility_result is None,
+        missing_info=missing_info if missing_info else None
+    )
 
 
-def extract_employment_status(text: str) -> Optional[str]:
-    """
-    Extract employment status from text
-    Returns: "employed", "self_employed", "unemployed", or None
+def _process_chat_coalesced(request: ChatRequest) -> asyncio.Future:
     """
-    text_lower = text.lower()
-    self_employed_keywords = ["self employed", "self-employed", "business owner", "own business", 
-                              "freelancer", "consultant", "entrepreneur"]
-    if any(keyword in text_lower for keyword in self_employed_keywords):
-        return "self_employed"
-    unemployed_keywords = ["unemployed", "not working", "no job", "between jobs", "looking for work"]
-    if any(keyword in text_lower for keyword in unemployed_keywords):
-        return "unemployed"
-    employed_keywords = ["employed", "working", "job", "salary", "salaried", "employee", 
-                         "work at", "work for", "company"]
-    if any(keyword in text_lower for keyword in employed_keywords):
-        return "employed"
+    Run the pipeline for a chat message, sharing one run between identical requests
     
-    return None
-
-
-def extract_employment_months(text: str) -> Optional[int]:
-    """
-    Extract employment duration in months
-    Handles: "working for 2 years", "employed 24 months", "2 years", "24 months", etc.
-    IMPORTANT: Excludes age patterns like "27 years old" to avoid confusion
+    A double-tapped send or client retry (same session, message and language)
+    that arrives while the first run is still in flight awaits that run instead
+    of starting a second pipeline, Gemini call and history entry. The pipeline is
+    synchronous (regex NLU + blocking Gemini call), so it runs in the threadpool.
     """
-    text_lower = text.lower()
-    age_indicators = [r"\d+\s+years?\s+old", r"age\s+(?:is|of)?\s*\d+", r"aged\s+\d+", r"\d+\s+years?\s+of\s+age"]
-    for age_pattern in age_indicators:
-        if re.search(age_pattern, text_lower):
-            return None  
-    patterns = [
-        
-        r"(?:working|employed|experience|job).*?(?:for|since|of)?\s*(\d+)\s*(?:years?|yrs?|y)\b",
-        r"(?:working|employed|experience|job).*?(?:for|since|of)?\s*(\d+)\s*(?:months?|mon)\b",
-        r"(\d+)\s*(?:years?|yrs?|y)\s*(?:of|in|at|with).*?(?:experience|employment|working|job)",
-        r"(\d+)\s*(?:months?|mon)\s*(?:of|in|at|with).*?(?:experience|employment|working|job)",
-        r"(\d+)\s*(?:years?|yrs?|y)\b(?!\s+old)",
-        r"(\d+)\s*(?:months?|mon)\b",
-    ]
-    
-    for i, pattern in enumerate(patterns):
-        match = re.search(pattern, text_lower)
-        if match:
-            num = int(match.group(1))
-            if i in [0, 2, 4] or "year" in pattern or "yr" in pattern:
-                months = num * 12
-                if 1 <= months <= 600:
-                    return months
-            else:
-                if 1 <= num <= 600:
-                    return num
-    
-    return None
+    key = (request.session_id, request.message, request.user_language)
+    task = _inflight_chats.get(key)
+    if task is None:
+        task = asyncio.ensure_future(run_in_threadpool(
+            orchestrator.process_request,
+            session_id=request.session_id,
+            user_input=request.message,
+            user_language=request.user_language,
+            audio_data=None,  # Can be extended to accept audio files
+            document_data=None  # Can be extended to accept documents
+        ))
+        _inflight_chats[key] = task
+        task.add_done_callback(lambda _: _inflight_chats.pop(key, None))
+    # Shielded so one client disconnecting does not cancel the shared run
+    return asyncio.shield(task)
 
 
-def detect_intent(text: str) -> str:
-    """
-    Detect user intent from text
-    
-    Returns:
-        - "apply_loan": User wants to apply for a loan
-        - "check_eligibility": User wants to check eligibility
-        - "ask_question": User has a general question
-        - "provide_info": User is providing information
-    """
-    text_lower = text.lower()
-    apply_keywords = ["apply", "want", "need", "looking for", "interested in", "get a loan"]
-    if any(keyword in text_lower for keyword in apply_keywords):
-        return "apply_loan"
-    eligibility_keywords = ["eligible", "eligibility", "can i get", "qualify", "qualification", "check"]
-    if any(keyword in text_lower for keyword in eligibility_keywords):
-        return "check_eligibility"
-    question_keywords = ["what", "how", "why", "when", "where", "?", "explain", "tell me"]
-    if any(keyword in text_lower for keyword in question_keywords):
-        return "ask_question"
-    
-    return "provide_info"
+def _process_session_messages(requests: List[ChatRequest]) -> List[ChatResponse]:
+    """Run one session's queued chat messages through the pipeline, in order"""
+    responses = []
+    for request in requests:
+        pipeline_response = orchestrator.process_request(
+            session_id=request.session_id,
+            user_input=request.message,
+            user_language=request.user_language
+        )
+        responses.append(_build_chat_response(pipeline_response, request.session_id))
+    return responses
 
 
-def extract_financial_data(text: str, existing_profile: Optional[UserFinancialProfile] = None) -> Dict:
+async def _process_chat_batch(requests: List[ChatRequest]) -> List[ChatResponse]:
     """
-    Extract all financial data from user text (IMPROVED)
+    Run queued chat messages through the pipeline
     
-    Returns dictionary with:
-    - extracted: Dictionary of extracted fields
-    - missing: List of missing required fields
-    - intent: Detected user intent
+    Each session's messages run in order in one threadpool call. Sessions are
+    independent, so different sessions run concurrently and their Gemini calls
+    overlap instead of queuing behind each other. Responses keep request order.
     """
-    extracted = {}
-    missing = []
-    intent = detect_intent(text)
-    loan_amount = extract_loan_amount(text)
-    if loan_amount:
-        extracted["loan_amount_requested"] = loan_amount
-    elif not existing_profile or existing_profile.loan_amount_requested == 0:
-        missing.append("loan amount")
-    
-    income = extract_income(text)
-    if income:
-        extracted["monthly_income"] = income
-    elif not existing_profile or existing_profile.monthly_income == 0:
-        missing.append("monthly income")
-    
-    age = extract_age(text)
-    if age:
-        extracted["age"] = age
-    elif not existing_profile or existing_profile.age == 0:
-        missing.append("age")
-    
-    employment_status = extract_employment_status(text)
-    if employment_status:
-        extracted["employment_status"] = employment_status
-    
-    if "age" not in extracted:
-        employment = extract_employment_months(text)
-        if employment:
-            extracted["employment_months"] = employment
-    else:
-        employment = extract_employment_months(text)
-        if employment:
-            if age and employment == age * 12:
-                pass
-            else:
-                extracted["employment_months"] = employment
-    
-    has_income = income or (existing_profile and existing_profile.monthly_income > 0)
-    if has_income and not employment and (not existing_profile or existing_profile.employment_months == 0):
-        missing.append("employment duration")
-    elif not has_income and (not existing_profile or existing_profile.employment_months == 0):
-        missing.append("employment duration")
+    by_session: Dict[str, List[int]] = {}
+    for index, request in enumerate(requests):
+        by_session.setdefault(request.session_id, []).append(index)
     
-    tenure = extract_tenure(text)
-    if tenure:
-        extracted["loan_tenure_years"] = tenure
-    elif not existing_profile or existing_profile.loan_tenure_years == 0:
-        missing.append("loan tenure")
+    session_responses = await asyncio.gather(*(
+        run_in_threadpool(_process_session_messages, [requests[i] for i in indices])
+        for indices in by_session.values()
+    ))
     
-    
-    loan_type = extract_loan_type(text)
-    if loan_type:
-        extracted["loan_type"] = loan_type
-    elif not existing_profile or not existing_profile.loan_type:
-        missing.append("loan type")
-    
-    existing_emi = extract_existing_loans_emi(text)
-    if existing_emi:
-        extracted["existing_loans_emi"] = existing_emi
-    
-    credit_card_payment = extract_credit_card_payment(text)
-    if credit_card_payment:
-        extracted["existing_credit_cards_min_payment"] = credit_card_payment
-    
-    return {
-        "extracted": extracted,
-        "missing": missing,
-        "intent": intent
-    }
-
+    responses: List[Optional[ChatResponse]] = [None] * len(requests)
+    for indices, session_batch in zip(by_session.values(), session_responses):
+        for index, response in zip(indices, session_batch):
+            responses[index] = response
+    return responses
 
 
 # Note: Session management is now handled by the Orchestrator
 # These functions are kept for backward compatibility with /eligibility/check endpoint
 
 
-
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """
@@ -581,41 +238,74 @@ async def chat_endpoint(request: ChatRequest):
                 detail="Orchestrator not available. Please check server configuration."
             )
         
-        # Process request through the full pipeline
-        pipeline_response = orchestrator.process_request(
-            session_id=request.session_id,
-            user_input=request.message,
-            user_language=request.user_language,
-            audio_data=None,  # Can be extended to accept audio files
-            document_data=None  # Can be extended to accept documents
-        )
-        
-        # Extract data from pipeline response
-        response_text = pipeline_response.get("response", "No response generated")
-        extracted_data = pipeline_response.get("extracted_data", {})
-        eligibility_result_data = pipeline_response.get("eligibility_result")
-        missing_info = pipeline_response.get("missing_info", [])
+        # Process request through the full pipeline (coalesced with an identical
+        # in-flight request, run in the threadpool)
+        pipeline_response = await _process_chat_coalesced(request)
         
-        # Determine if clarification is needed
-        # Check if eligibility was calculated (means we have enough info)
-        needs_clarification = eligibility_result_data is None
+        return _build_chat_response(pipeline_response, request.session_id)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+
+@app.post("/chat/batch", response_model=List[ChatResponse])
+async def chat_batch_endpoint(requests: List[ChatRequest]):
+    """
+    Batch chat endpoint - for messages the app queued while offline
+    
+    Messages for one session are processed in the order given, so they behave
+    exactly like sequential /chat calls. Messages for different sessions run
+    concurrently. Responses are returned in request order.
+    """
+    try:
+        if orchestrator is None:
+            raise HTTPException(
+                status_code=503, 
+                detail="Orchestrator not available. Please check server configuration."
+            )
         
-        # Use eligibility result directly (orchestrator now includes all fields)
-        eligibility_result = eligibility_result_data
+        if len(requests) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch too large. Send at most {MAX_BATCH_SIZE} messages per request."
+            )
         
-        return ChatResponse(
-            response=response_text,
-            session_id=request.session_id,
-            extracted_data=extracted_data if extracted_data else None,
-            eligibility_result=eligibility_result,
-            needs_clarification=needs_clarification,
-            missing_info=missing_info if missing_info else None
-        )
+        return await _process_chat_batch(requests)
     
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
+
+
+async def _read_upload_capped(upload: UploadFile, max_bytes: int) -> bytes:
+    """
+    Read an upload in chunks, failing with 413 as soon as it exceeds max_bytes
+    
+    Args:
+        upload: Uploaded file
+        max_bytes: Maximum accepted size in bytes
+        
+    Returns:
+        File content
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio file too large. Maximum size is {max_bytes // (1024 * 1024)} MB."
+        )
+    
+    buffer = bytearray()
+    while chunk := await upload.read(AUDIO_CHUNK_SIZE):
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Audio file too large. Maximum size is {max_bytes // (1024 * 1024)} MB."
+            )
+    return bytes(buffer)
 
 
 @app.post("/chat/audio", response_model=ChatResponse)
@@ -650,8 +340,8 @@ async def chat_audio_endpoint(
             # We'll let Whisper handle format validation
             pass
         
-        # Read audio file content
-        audio_data = await audio_file.read()
+        # Read audio file content in chunks, rejecting oversize uploads early
+        audio_data = await _read_upload_capped(audio_file, MAX_AUDIO_BYTES)
         
         if len(audio_data) == 0:
             raise HTTPException(
@@ -659,8 +349,11 @@ async def chat_audio_endpoint(
                 detail="Audio file is empty. Please upload a valid audio file."
             )
         
-        # Process request through the full pipeline with audio
-        pipeline_response = orchestrator.process_request(
+        # Process request through the full pipeline with audio (Whisper STT + LLM
+        # are blocking, so run them in the threadpool like /chat; STTService runs
+        # one transcription at a time on its shared model)
+        pipeline_response = await run_in_threadpool(
+            orchestrator.process_request,
             session_id=session_id,
             user_input="",  # Will be generated from audio via STT
             user_language=user_language,
@@ -696,7 +389,7 @@ async def chat_audio_endpoint(
         # Use eligibility result directly (orchestrator now includes all fields)
         eligibility_result = eligibility_result_data
         
-        return ChatResponse(
+        return ChatResponse.model_construct(
             response=response_text,
             session_id=session_id,
             extracted_data=extracted_data if extracted_data else None,
@@ -714,33 +407,38 @@ async def chat_audio_endpoint(
         )
 
 
+def _profile_from_request(request: EligibilityCheckRequest) -> UserFinancialProfile:
+    """Build the rules-engine profile for a direct eligibility request"""
+    loan_type = _LOAN_TYPE_ALIASES.get(request.loan_type.lower())
+    if not loan_type:
+        raise HTTPException(status_code=400, detail="Invalid loan type")
+    
+    return UserFinancialProfile(
+        monthly_income=request.monthly_income,
+        age=request.age,
+        employment_months=request.employment_months,
+        loan_type=loan_type,
+        loan_amount_requested=request.loan_amount_requested or 0,
+        loan_tenure_years=request.loan_tenure_years or 0,
+        existing_loans_emi=request.existing_loans_emi,
+        existing_credit_cards_min_payment=request.existing_credit_cards_min_payment
+    )
+
+
+def _sse_events(chunks: Iterator[str]) -> Iterator[str]:
+    """Format text chunks as Server-Sent Events, ending with a "done" event"""
+    for chunk in chunks:
+        yield "".join(f"data: {line}\n" for line in chunk.split("\n")) + "\n"
+    yield "event: done\ndata: \n\n"
+
+
 @app.post("/eligibility/check")
 async def check_eligibility_endpoint(request: EligibilityCheckRequest):
     """
     Direct eligibility check endpoint (if you have all data upfront)
     """
     try:
-        loan_type_map = {
-            "personal_loan": LoanType.PERSONAL,
-            "home_loan": LoanType.HOME,
-            "car_loan": LoanType.CAR,
-            "education_loan": LoanType.EDUCATION
-        }
-        
-        loan_type = loan_type_map.get(request.loan_type.lower())
-        if not loan_type:
-            raise HTTPException(status_code=400, detail="Invalid loan type")
-        
-        profile = UserFinancialProfile(
-            monthly_income=request.monthly_income,
-            age=request.age,
-            employment_months=request.employment_months,
-            loan_type=loan_type,
-            loan_amount_requested=request.loan_amount_requested or 0,
-            loan_tenure_years=request.loan_tenure_years or 0,
-            existing_loans_emi=request.existing_loans_emi,
-            existing_credit_cards_min_payment=request.existing_credit_cards_min_payment
-        )
+        profile = _profile_from_request(request)
         
         result = check_eligibility(profile)
         summary = get_loan_summary(profile, result)
@@ -754,14 +452,53 @@ async def check_eligibility_endpoint(request: EligibilityCheckRequest):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+@app.post("/eligibility/explain/stream")
+async def explain_eligibility_stream_endpoint(request: EligibilityCheckRequest, user_language: str = "english"):
+    """
+    Eligibility check with a streamed LLM explanation (Server-Sent Events)
+    
+    Runs the same rules as /eligibility/check, then streams the explanation as
+    `data:` events while Gemini generates it, ending with an `event: done`.
+    The blocking Gemini stream is iterated in the threadpool by StreamingResponse.
+    """
+    profile = _profile_from_request(request)
+    result = check_eligibility(profile)
+    
+    tenure_was_provided = profile.loan_tenure_years > 0
+    context = EligibilityContext(
+        is_eligible=result.is_eligible,
+        eligible_amount=result.eligible_amount,
+        requested_amount=profile.loan_amount_requested,
+        suggested_emi=result.suggested_emi,
+        tenure_years=profile.loan_tenure_years if tenure_was_provided else (result.max_tenure_years or 5),
+        loan_type=profile.loan_type.value,
+        dti_ratio=result.dti_ratio,
+        rejection_reasons=result.rejection_reasons,
+        warnings=result.warnings,
+        user_profile={
+            "monthly_income": profile.monthly_income,
+            "age": profile.age,
+            "employment_months": profile.employment_months
+        },
+        tenure_was_provided=tenure_was_provided
+    )
+    
+    return StreamingResponse(
+        _sse_events(llm_service.explain_eligibility_stream(context, user_language)),
+        media_type="text/event-stream"
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Loan Advisor API"}
 
 
-
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # loop/http "auto" pick uvloop and httptools (installed with uvicorn[standard])
+    # and fall back to asyncio/h11 where they are unavailable, e.g. on Windows.
+    # Keep a single worker: sessions and in-flight /chat runs live in process memory.
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto", http="auto", workers=1)
 
@@ -8,8 +8,15 @@ Key Responsibilities:
 
 import os
 import json
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass, asdict
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Dict, Optional, Tuple, Iterator, Hashable, Deque
+from itertools import islice
+from functools import lru_cache
+from dataclasses import dataclass
 from dotenv import load_dotenv
 import google.generativeai as genai
 
@@ -17,14 +24,85 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 MODEL_NAME = "gemini-2.5-flash"  
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "grpc")
 GENERATION_CONFIG = {
     "temperature": 0.7,  
     "top_p": 0.95,
     "top_k": 40,
     "max_output_tokens": 2048,  # Increased for longer eligibility explanations
 }
+# Per-call override for the ask_* methods, which only ever produce one short question
+# (1-2 sentences); the cap leaves headroom for Devanagari/Tamil, which tokenize longer
+QUESTION_GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "top_p": 0.9,
+    "top_k": 40,
+    "max_output_tokens": 128,
+    "stop_sequences": ["\n\n"],  # Stop after the first paragraph
+}
+
+GREETING_CACHE_TTL_SECONDS = 600  # Reuse a generated greeting per language for 10 minutes
+ELIGIBILITY_CACHE_TTL_SECONDS = 3600  # Reuse an eligibility explanation for an identical prompt for 1 hour
+ELIGIBILITY_CACHE_SIZE = 256
+MAX_HISTORY_MESSAGES = 50  # Per session; readers only look at recent turns (prompts use the last 10)
+# Backstop for callers without an Orchestrator; matches its default max_sessions,
+# and the Orchestrator clears history itself when it evicts a session
+MAX_HISTORY_SESSIONS = 10000
+
+# Script detection for detect_language: any character of the Unicode block
+_DEVANAGARI_RE = re.compile("[\u0900-\u097F]")
+_TAMIL_RE = re.compile("[\u0B80-\u0BFF]")
+
+
+class GeminiExtractionError(RuntimeError):
+    """
+    Raised when a Gemini response has no usable text
+    
+    block_reason carries the prompt block reason or candidate finish reason
+    (e.g. SAFETY) when the response reports one.
+    """
+    
+    def __init__(self, block_reason=None):
+        self.block_reason = block_reason
+        super().__init__(f"Gemini response has no text (reason: {block_reason or 'unknown'})")
 
-@dataclass
+
+class _ResponseCache:
+    """
+    Small thread-safe LRU cache with TTL for LLM replies that depend only on their key
+    
+    Used for prompts with no session state (the greeting, eligibility
+    explanations), so repeated requests skip the Gemini round trip.
+    """
+    
+    def __init__(self, maxsize: int = 64, ttl_seconds: float = GREETING_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[str]:
+        """Cached reply for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: Hashable, value: str):
+        """Store a reply, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+@dataclass(frozen=True)
 class ConversationMessage:
     """Single message in conversation"""
     role: str 
@@ -32,7 +110,7 @@ class ConversationMessage:
     timestamp: Optional[str] = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class EligibilityContext:
     """Structured eligibility data to pass to LLM"""
     is_eligible: bool
@@ -98,6 +176,47 @@ You are NOT a general chatbot.
 You are a controlled, deterministic question-collection agent."""
 
 
+def _bullets(items: List[str]) -> str:
+    """Format items as "- item" lines"""
+    return "\n".join(f"- {item}" for item in items)
+
+
+# Prompt labels for the roles add_to_history stores
+_ROLE_LABELS = {"user": "USER", "assistant": "ASSISTANT", "system": "SYSTEM"}
+
+
+def _format_history(messages: List[ConversationMessage], n: int) -> str:
+    """Format the last n messages as "ROLE: content" lines for a prompt"""
+    return "".join(
+        f"{_ROLE_LABELS.get(msg.role) or msg.role.upper()}: {msg.content}\n"
+        for msg in messages[-n:]
+    )
+
+
+# Static instruction blocks of the eligibility explanation prompt
+_ELIGIBLE_INSTRUCTIONS_HEAD = """Provide a congratulatory message explaining:
+1. That they are eligible
+2. The eligible amount and EMI"""
+_ELIGIBLE_INSTRUCTIONS_TAIL = """
+3. Next steps (if any)
+4. Any important terms they should know
+
+CRITICAL: Do NOT ask for tenure again. If tenure was not provided, mention it's based on standard terms and they can choose their preferred tenure when applying. Do NOT ask them to provide it now."""
+_INELIGIBLE_INSTRUCTIONS = """
+
+Provide an empathetic explanation that:
+1. Acknowledges their interest in the loan
+2. Clearly explains why they are not eligible (using the reasons above)
+3. Suggests what they can do to become eligible in the future
+4. Offers encouragement and support"""
+
+
+@lru_cache(maxsize=32)
+def _loan_type_title(loan_type: str) -> str:
+    """Display name for a loan type value, e.g. home_loan -> Home Loan"""
+    return loan_type.replace('_', ' ').title()
+
+
 def build_eligibility_explanation_prompt(
     context: EligibilityContext,
     user_language: str = "english"
@@ -115,7 +234,7 @@ def build_eligibility_explanation_prompt(
     prompt = f"""Based on the following loan eligibility analysis, provide a clear, friendly explanation to the user.
 
 ELIGIBILITY RESULTS:
-- Loan Type: {context.loan_type.replace('_', ' ').title()}
+- Loan Type: {_loan_type_title(context.loan_type)}
 - Eligible: {'Yes' if context.is_eligible else 'No'}
 - Eligible Amount: ₹{context.eligible_amount:,.0f}
 - Requested Amount: ₹{context.requested_amount:,.0f}
@@ -131,38 +250,55 @@ USER PROFILE:
 
 """
     
+    parts = [prompt]
     if context.is_eligible:
         tenure_note = ""
-        if hasattr(context, 'tenure_was_provided') and not context.tenure_was_provided:
+        if not context.tenure_was_provided:
             tenure_note = f" The calculation is based on a standard tenure of {context.tenure_years} years. You can choose a different tenure (typically 1-{context.tenure_years} years) when you apply."
         elif context.tenure_years > 0 and context.tenure_years <= 30:
             tenure_note = f" The loan tenure is {context.tenure_years} years."
         
-        prompt += f"""Provide a congratulatory message explaining:
-1. That they are eligible
-2. The eligible amount and EMI{tenure_note}
-3. Next steps (if any)
-4. Any important terms they should know
-
-CRITICAL: Do NOT ask for tenure again. If tenure was not provided, mention it's based on standard terms and they can choose their preferred tenure when applying. Do NOT ask them to provide it now."""
+        parts += (_ELIGIBLE_INSTRUCTIONS_HEAD, tenure_note, _ELIGIBLE_INSTRUCTIONS_TAIL)
     else:
-        prompt += f"""REJECTION REASONS:
-{chr(10).join(f"- {reason}" for reason in context.rejection_reasons)}
-
-Provide an empathetic explanation that:
-1. Acknowledges their interest in the loan
-2. Clearly explains why they are not eligible (using the reasons above)
-3. Suggests what they can do to become eligible in the future
-4. Offers encouragement and support"""
+        parts += ("REJECTION REASONS:\n", _bullets(context.rejection_reasons), _INELIGIBLE_INSTRUCTIONS)
     
     if context.warnings:
-        prompt += f"""\n\nIMPORTANT WARNINGS:
-{chr(10).join(f"- {w}" for w in context.warnings)}"""
+        parts += ("\n\nIMPORTANT WARNINGS:\n", _bullets(context.warnings))
     
     if user_language != "english":
-        prompt += f"\n\nIMPORTANT: Respond in {user_language} language."
+        parts.append(f"\n\nIMPORTANT: Respond in {user_language} language.")
     
-    return prompt
+    return "".join(parts)
+
+
+# Static blocks of the clarification prompt
+_CLARIFICATION_RULES = """You are a strictly rule-following question-collection agent.
+
+CURRENT QUESTION: {missing_info}
+
+CRITICAL RULES:
+- Ask ONLY ONE question - the exact question for {missing_info}
+- NO explanations, NO extra text, NO emojis
+- NO assumptions about what the user might have meant
+- If the user's previous answer was unclear, re-ask the SAME question clearly
+- If the user tries to answer a different question, politely redirect: "I need your answer to the current question first."
+- Output ONLY the question - nothing else
+"""
+_EMPLOYED_CONTEXT_NOTE = """
+Context: The user mentioned income, so they are likely employed. We need how long they've been employed to assess eligibility.
+"""
+_ALREADY_ASKED_INSTRUCTIONS = """
+IMPORTANT: You already asked for {missing_info}. Acknowledge that, avoid repeating, and politely ask for a clearer answer or confirmation.
+Keep it kind and non-repetitive."""
+_ASK_EMPLOYMENT_DURATION_INSTRUCTIONS = """
+Ask how long they have been employed (months/years). Explain briefly it's needed for eligibility.
+Keep it to one friendly sentence."""
+_ASK_MISSING_INFO_INSTRUCTIONS = """
+Ask ONE clear, specific question for the {missing_info}. Keep it friendly, professional, and one sentence.
+Explain briefly it's needed to check eligibility."""
+
+# Any of these in a recent user message counts as income having been mentioned
+_INCOME_MENTION_RE = re.compile(r"income|salary|earning|50000|1 lakh")
 
 
 def build_clarification_prompt(
@@ -181,59 +317,69 @@ def build_clarification_prompt(
     Returns:
         Formatted prompt string
     """
-    already_asked = False
-    for msg in conversation_history[-6:]:
-        if msg.role == "assistant" and missing_info.lower() in msg.content.lower():
-            already_asked = True
-            break
+    missing_info_lower = missing_info.lower()
+    recent = [(msg.role, msg.content.lower()) for msg in conversation_history[-6:]]
+    already_asked = any(role == "assistant" and missing_info_lower in content for role, content in recent)
+    has_income_mentioned = any(role == "user" and _INCOME_MENTION_RE.search(content) for role, content in recent)
     
-    has_income_mentioned = False
-    for msg in conversation_history[-6:]:
-        if msg.role == "user" and any(word in msg.content.lower() for word in ["income", "salary", "earning", "50000", "1 lakh"]):
-            has_income_mentioned = True
-            break
+    ask_employment_duration = missing_info == "employment duration" and has_income_mentioned
     
-    prompt = f"""You are a strictly rule-following question-collection agent.
-
-CURRENT QUESTION: {missing_info}
-
-CRITICAL RULES:
-- Ask ONLY ONE question - the exact question for {missing_info}
-- NO explanations, NO extra text, NO emojis
-- NO assumptions about what the user might have meant
-- If the user's previous answer was unclear, re-ask the SAME question clearly
-- If the user tries to answer a different question, politely redirect: "I need your answer to the current question first."
-- Output ONLY the question - nothing else
-"""
+    parts = [_CLARIFICATION_RULES.format(missing_info=missing_info)]
+    if ask_employment_duration:
+        parts.append(_EMPLOYED_CONTEXT_NOTE)
+    parts += ("\nRECENT CONVERSATION:\n", _format_history(conversation_history, 6))
     
-    if missing_info == "employment duration" and has_income_mentioned:
-        prompt += """
-Context: The user mentioned income, so they are likely employed. We need how long they've been employed to assess eligibility.
-"""
+    if already_asked:
+        parts.append(_ALREADY_ASKED_INSTRUCTIONS.format(missing_info=missing_info))
+    elif ask_employment_duration:
+        parts.append(_ASK_EMPLOYMENT_DURATION_INSTRUCTIONS)
+    else:
+        parts.append(_ASK_MISSING_INFO_INSTRUCTIONS.format(missing_info=missing_info))
     
-    prompt += """
+    parts.append(f"\n\nIMPORTANT: Respond in {user_language} language.")
+    return "".join(parts)
+
+
+# Shell of the single-question prompts; the question-flow rules (one question,
+# no extra text, re-ask on unclear answers) live in SYSTEM_PROMPT
+_QUESTION_SHELL = """CURRENT QUESTION: {question}
+{notes}
 RECENT CONVERSATION:
+{history}
+IMPORTANT: Respond in {user_language} language. Output ONLY the question."""
+_EXISTING_DEBTS_NOTES = """
+You must ask ONE question covering:
+- Any existing loan EMIs
+- Any credit card minimum payments
+
+Keep it short (1-2 sentences). If they have none, they can say "none".
 """
-    for msg in conversation_history[-6:]:  # Show more context
-        prompt += f"{msg.role.upper()}: {msg.content}\n"
-    
-    if already_asked:
-        prompt += f"""
-IMPORTANT: You already asked for {missing_info}. Acknowledge that, avoid repeating, and politely ask for a clearer answer or confirmation.
-Keep it kind and non-repetitive."""
-    else:
-        if missing_info == "employment duration" and has_income_mentioned:
-            prompt += f"""
-Ask how long they have been employed (months/years). Explain briefly it's needed for eligibility.
-Keep it to one friendly sentence."""
-        else:
-            prompt += f"""
-Ask ONE clear, specific question for the {missing_info}. Keep it friendly, professional, and one sentence.
-Explain briefly it's needed to check eligibility."""
+
+
+def build_question_prompt(
+    question: str,
+    conversation_history: List[ConversationMessage],
+    user_language: str = "english",
+    notes: str = ""
+) -> str:
+    """
+    Build a prompt that asks the user for a single piece of information
     
-    prompt += f"\n\nIMPORTANT: Respond in {user_language} language."
+    Args:
+        question: What the question is about
+        conversation_history: Recent conversation context (last 4 messages are used)
+        user_language: User's preferred language
+        notes: Extra instructions placed before the conversation
     
-    return prompt
+    Returns:
+        Formatted prompt string
+    """
+    return _QUESTION_SHELL.format(
+        question=question,
+        notes=notes,
+        history=_format_history(conversation_history, 4),
+        user_language=user_language,
+    )
 
 
 def build_general_conversation_prompt(
@@ -252,20 +398,68 @@ def build_general_conversation_prompt(
     Returns:
         Formatted prompt string
     """
-    prompt = f"""User Message: {user_message}
+    return f"""User Message: {user_message}
 
 CONVERSATION HISTORY:
-"""
-    for msg in conversation_history[-6:]: 
-        prompt += f"{msg.role.upper()}: {msg.content}\n"
-    
-    prompt += f"""
+{_format_history(conversation_history, 6)}
 Respond naturally to the user's message. If they're asking about loans, guide them.
 If they're greeting you, greet them back warmly.
 
 IMPORTANT: Respond in {user_language} language."""
+
+
+def build_eligibility_batch_requests(
+    contexts: Dict[str, EligibilityContext],
+    user_language: str = "english"
+) -> str:
+    """
+    Build a Gemini Batch Mode input file for eligibility explanations
+    
+    For bulk, non-interactive workloads (reports, re-scoring applicants) where
+    Batch Mode's lower price and higher throughput beat latency. Submit the file
+    with the Batch API and feed the output file to
+    LLMService.cache_batch_results.
     
-    return prompt
+    Args:
+        contexts: Eligibility results keyed by a caller-chosen request key
+        user_language: Language for every explanation
+    
+    Returns:
+        JSONL text, one request per line
+    """
+    lines = []
+    for key, context in contexts.items():
+        lines.append(json.dumps({
+            "key": key,
+            "request": {
+                "system_instruction": {"parts": [{"text": SYSTEM_PROMPT}]},
+                "contents": [{"role": "user", "parts": [{"text": build_eligibility_explanation_prompt(context, user_language)}]}],
+                "generation_config": GENERATION_CONFIG,
+            },
+        }, ensure_ascii=False))
+    return "\n".join(lines)
+
+
+def _part_texts(parts) -> List[str]:
+    """Stripped, non-empty text of each response part (parts without text are skipped)"""
+    texts = []
+    for part in parts:
+        try:
+            text = part.text.strip()
+        except (AttributeError, ValueError):
+            continue
+        if text:
+            texts.append(text)
+    return texts
+
+
+def _chunk_text(response) -> str:
+    """Raw text of a streamed response chunk (whitespace kept, it can fall between chunks)"""
+    try:
+        return "".join(getattr(part, "text", "") or "" for part in response.candidates[0].content.parts)
+    except (AttributeError, IndexError, TypeError):
+        return ""
+
 
 class LLMService:
     """Service for interacting with Gemini API"""
@@ -292,81 +486,79 @@ class LLMService:
                 "3. Get your API key from: https://makersuite.google.com/app/apikey\n"
                 "   Or pass api_key parameter when initializing LLMService()"
             )
-        genai.configure(api_key=final_api_key)
+        # One long-lived gRPC channel is shared by every call (no per-request TLS
+        # handshake); set GEMINI_TRANSPORT=rest where gRPC egress is blocked
+        genai.configure(api_key=final_api_key, transport=GEMINI_TRANSPORT)
         
+        # SYSTEM_PROMPT is sent as the system instruction, so every request starts
+        # with the same token prefix and Gemini's implicit prefix caching applies
         self.model = genai.GenerativeModel(
             model_name=MODEL_NAME,
-            generation_config=GENERATION_CONFIG
+            generation_config=GENERATION_CONFIG,
+            system_instruction=SYSTEM_PROMPT
         )
-        self.conversation_history: Dict[str, List[ConversationMessage]] = {}
+        # Least recently active session first
+        self.conversation_history: "OrderedDict[str, Deque[ConversationMessage]]" = OrderedDict()
+        # Guards conversation_history: API requests for different sessions run on
+        # worker threads and all share this dict and its LRU order
+        self._history_lock = threading.Lock()
+        self.greeting_cache = _ResponseCache()
+        self.eligibility_cache = _ResponseCache(ELIGIBILITY_CACHE_SIZE, ELIGIBILITY_CACHE_TTL_SECONDS)
 
     def _extract_text(self, response) -> str:
         """
         Safely extract text from Gemini responses (single or multi-part).
-        Avoids `.text` quick accessor errors by falling back to parts/candidates.
+        Reads candidates[0].content.parts (response.parts is the same list) and
+        only falls back to the `.text` quick accessor, which raises for
+        multi-part responses.
         
         IMPORTANT: Do NOT use hasattr(response, 'text') as it triggers the property
         getter which raises ValueError for multi-part responses.
-        """
-        try:
-            if hasattr(response, 'candidates') and response.candidates:
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'content') and candidate.content:
-                    parts = getattr(candidate.content, 'parts', None)
-                    if parts is not None:
-                        texts = []
-                        for part in parts:
-                            if hasattr(part, 'text'):
-                                try:
-                                    part_text = part.text
-                                    if part_text and part_text.strip():
-                                        texts.append(part_text.strip())
-                                except Exception:
-                                    pass
-                        if texts:
-                            return " ".join(texts)
-        except (AttributeError, IndexError, TypeError, Exception) as e:
-            pass
         
+        Raises:
+            GeminiExtractionError: If the response has no text (blocked or empty)
+        """
         try:
-            if hasattr(response, 'parts') and response.parts:
-                texts = []
-                for part in response.parts:
-                    if hasattr(part, 'text'):
-                        part_text = part.text
-                        if part_text and part_text.strip():
-                            texts.append(part_text.strip())
+            parts = response.candidates[0].content.parts
+            if len(parts) == 1:
+                # Common case: a single text part
+                text = parts[0].text.strip()
+                if text:
+                    return text
+            else:
+                texts = _part_texts(parts)
                 if texts:
                     return " ".join(texts)
-        except (AttributeError, TypeError, Exception) as e:
+        except Exception:
             pass
         
         try:
             text = response.text
             if text and text.strip():
                 return text.strip()
-        except (ValueError, AttributeError, Exception) as e:
+        except Exception:
+            pass
+        
+        block_reason = None
+        try:
+            block_reason = response.prompt_feedback.block_reason or response.candidates[0].finish_reason
+        except Exception:
             pass
         
         import logging
         logger = logging.getLogger(__name__)
-        logger.error(f"Failed to extract text from response. Type: {type(response).__name__}")
-        return "(I apologize, but I'm having trouble processing the response. Please try again.)"
+        logger.error(f"Failed to extract text from response. Type: {type(response).__name__}, reason: {block_reason}")
+        raise GeminiExtractionError(block_reason)
     
     def detect_language(self, text: str) -> str:
         """
         Simple language detection (can be enhanced with proper library)
         
-        For now, checks for common Hindi/Tamil words
+        Checks for Devanagari (Hindi) or Tamil script characters
         """
-        text_lower = text.lower()
-        
-        hindi_indicators = ["है", "में", "के", "लिए", "कर", "हो", "नहीं"]
-        tamil_indicators = ["ஆக", "இல்", "க்கு", "ஆன", "இல்லை"]
-        
-        if any(indicator in text for indicator in hindi_indicators):
+        if _DEVANAGARI_RE.search(text):
             return "hindi"
-        elif any(indicator in text for indicator in tamil_indicators):
+        elif _TAMIL_RE.search(text):
             return "tamil"
         else:
             return "english"
@@ -390,31 +582,105 @@ class LLMService:
         """
         prompt = build_eligibility_explanation_prompt(context, user_language)
         
-        full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
+        # The prompt carries every number the explanation quotes, so it is the key
+        cached = self.eligibility_cache.get(prompt)
+        if cached:
+            return cached
         
         try:
-            generation_config = {
-                "temperature": 0.7,
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": 2048,  # Higher limit for detailed explanations
-            }
-            response = self.model.generate_content(full_prompt, generation_config=generation_config)
-            
+            response = self.model.generate_content(prompt)
             extracted_text = self._extract_text(response)
-            
-            if extracted_text.startswith("(Unable to extract") or extracted_text.startswith("(I apologize"):
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Failed to extract text from eligibility explanation response")
-                return "I apologize, but I'm having trouble processing the eligibility results right now. Please try again."
+            self.eligibility_cache.put(prompt, extracted_text)
             return extracted_text
+        except GeminiExtractionError:
+            return "I apologize, but I'm having trouble processing the eligibility results right now. Please try again."
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error in explain_eligibility: {e}", exc_info=True)
             return f"I apologize, but I'm having trouble processing your request right now. Please try again later."
     
+    def explain_eligibility_stream(
+        self,
+        context: EligibilityContext,
+        user_language: str = "english"
+    ) -> Iterator[str]:
+        """
+        Stream an explanation of eligibility results as Gemini generates it
+        
+        Same prompt and cache as explain_eligibility, but text is yielded chunk
+        by chunk so the client can show the first words without waiting for
+        the whole reply.
+        
+        Args:
+            context: Eligibility calculation results
+            user_language: User's preferred language
+        
+        Yields:
+            Explanation text chunks
+        """
+        prompt = build_eligibility_explanation_prompt(context, user_language)
+        
+        cached = self.eligibility_cache.get(prompt)
+        if cached:
+            yield cached
+            return
+        
+        chunks = []
+        try:
+            for response in self.model.generate_content(prompt, stream=True):
+                text = _chunk_text(response)
+                if text:
+                    chunks.append(text)
+                    yield text
+        except Exception as e:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f"Error in explain_eligibility_stream: {e}", exc_info=True)
+            yield "I apologize, but I'm having trouble processing your request right now. Please try again later."
+            return
+        
+        if chunks:
+            self.eligibility_cache.put(prompt, "".join(chunks).strip())
+        else:
+            # No chunk had text; the non-streaming path raises GeminiExtractionError here
+            yield "I apologize, but I'm having trouble processing the eligibility results right now. Please try again."
+    
+    def cache_batch_results(
+        self,
+        contexts: Dict[str, EligibilityContext],
+        results_jsonl: str,
+        user_language: str = "english"
+    ) -> int:
+        """
+        Load a Batch Mode output file into the eligibility explanation cache
+        
+        Args:
+            contexts: The contexts passed to build_eligibility_batch_requests
+            results_jsonl: Batch output file content
+            user_language: Language the batch was built with
+        
+        Returns:
+            Number of explanations cached (failed requests are skipped)
+        """
+        cached = 0
+        for line in results_jsonl.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            context = contexts.get(result.get("key"))
+            if context is None or "response" not in result:
+                continue
+            try:
+                parts = result["response"]["candidates"][0]["content"]["parts"]
+            except (KeyError, IndexError, TypeError):
+                continue
+            text = " ".join(part["text"].strip() for part in parts if part.get("text", "").strip())
+            if text:
+                self.eligibility_cache.put(build_eligibility_explanation_prompt(context, user_language), text)
+                cached += 1
+        return cached
+    
     def ask_clarification_with_acknowledgment(
         self,
         missing_info: str,
@@ -438,28 +704,13 @@ class LLMService:
         if "employment_months" in extracted_data:
             provided_items.append("employment duration")
         
-        prompt = f"""You are a strictly rule-following question-collection agent.
-
-CURRENT QUESTION: {missing_info}
-
-CRITICAL RULES:
-- Ask ONLY ONE question for {missing_info}
-- NO explanations, NO extra text, NO emojis
-- NO acknowledgments or conversational fillers
-- Output ONLY the question - nothing else
-- If user's previous answer was unclear, re-ask the SAME question clearly
-
-RECENT CONVERSATION:
-"""
-        for msg in conversation_history[-4:]:
-            prompt += f"{msg.role.upper()}: {msg.content}\n"
-        
-        prompt += f"\nIMPORTANT: Respond in {user_language} language. Output ONLY the question."
+        prompt = build_question_prompt(missing_info, conversation_history, user_language)
         
         try:
-            full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
-            response = self.model.generate_content(full_prompt)
+            response = self.model.generate_content(prompt, generation_config=QUESTION_GENERATION_CONFIG)
             return self._extract_text(response)
+        except GeminiExtractionError:
+            return f"Could you please provide your {missing_info}?"
         except Exception as e:
             return f"Could you please provide your {missing_info}? (Error: {str(e)})"
     
@@ -472,33 +723,15 @@ RECENT CONVERSATION:
         """
         Ask user about existing loans/EMIs for accurate DTI calculation
         """
-        prompt = f"""You are a strictly rule-following question-collection agent.
-
-CURRENT QUESTION: existing debts (loans/credit card payments)
-
-CRITICAL RULES:
-- Ask ONLY ONE question about existing loans/EMIs and credit card payments
-- NO explanations, NO extra text, NO emojis
-- Output ONLY the question - nothing else
-- If user tries to skip or answer something else, repeat the same question
-
-You must ask ONE question covering:
-- Any existing loan EMIs
-- Any credit card minimum payments
-
-Keep it short (1-2 sentences). If they have none, they can say "none".
-
-RECENT CONVERSATION:
-"""
-        for msg in conversation_history[-4:]:
-            prompt += f"{msg.role.upper()}: {msg.content}\n"
-        
-        prompt += f"\nIMPORTANT: Respond in {user_language} language. Output ONLY the question."
-        
-        full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
+        prompt = build_question_prompt(
+            "existing debts (loans/credit card payments)",
+            conversation_history,
+            user_language,
+            notes=_EXISTING_DEBTS_NOTES,
+        )
         
         try:
-            response = self.model.generate_content(full_prompt)
+            response = self.model.generate_content(prompt, generation_config=QUESTION_GENERATION_CONFIG)
             return self._extract_text(response)
         except Exception as e:
             return f"Do you have any existing loans or credit card payments?"
@@ -518,6 +751,10 @@ RECENT CONVERSATION:
         Returns:
             Greeting message text
         """
+        cached = self.greeting_cache.get(user_language)
+        if cached:
+            return cached
+        
         prompt = f"""You are a strictly rule-following question-collection agent. This is the start of a new conversation.
 
 CRITICAL RULES:
@@ -528,11 +765,11 @@ CRITICAL RULES:
 
 IMPORTANT: Respond in {user_language} language."""
         
-        full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
-        
         try:
-            response = self.model.generate_content(full_prompt)
-            return self._extract_text(response)
+            response = self.model.generate_content(prompt, generation_config=QUESTION_GENERATION_CONFIG)
+            greeting = self._extract_text(response)
+            self.greeting_cache.put(user_language, greeting)
+            return greeting
         except Exception as e:
             if user_language.lower() in ["hindi", "हिंदी"]:
                 return "नमस्ते! मैं आपकी लोन पात्रता जांचने में मदद करूंगा। कृपया बताएं कि आपको कितने रुपये का लोन चाहिए?"
@@ -555,28 +792,15 @@ IMPORTANT: Respond in {user_language} language."""
         Returns:
             Question about employment status
         """
-        prompt = f"""You are a strictly rule-following question-collection agent.
-
-CURRENT QUESTION: employment status (salaried or self-employed)
-
-CRITICAL RULES:
-- Ask ONLY ONE question about employment status
-- NO explanations, NO extra text, NO emojis
-- Output ONLY the question - nothing else
-- If user tries to skip or answer something else, repeat the same question
-
-RECENT CONVERSATION:
-"""
-        for msg in conversation_history[-4:]:
-            prompt += f"{msg.role.upper()}: {msg.content}\n"
-        
-        prompt += f"\nIMPORTANT: Respond in {user_language} language. Output ONLY the question."
-        
-        full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
+        prompt = build_question_prompt(
+            "employment status (salaried or self-employed)", conversation_history, user_language
+        )
         
         try:
-            response = self.model.generate_content(full_prompt)
+            response = self.model.generate_content(prompt, generation_config=QUESTION_GENERATION_CONFIG)
             return self._extract_text(response)
+        except GeminiExtractionError:
+            return "Are you a salaried employee or self-employed?"
         except Exception as e:
             return f"Are you a salaried employee or self-employed? (Error: {str(e)})"
     
@@ -600,11 +824,12 @@ RECENT CONVERSATION:
             Clarification question text
         """
         prompt = build_clarification_prompt(missing_info, conversation_history, user_language)
-        full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
         
         try:
-            response = self.model.generate_content(full_prompt)
+            response = self.model.generate_content(prompt, generation_config=QUESTION_GENERATION_CONFIG)
             return self._extract_text(response)
+        except GeminiExtractionError:
+            return f"Could you please provide your {missing_info}?"
         except Exception as e:
             return f"Could you please provide your {missing_info}? (Error: {str(e)})"
     
@@ -633,34 +858,106 @@ RECENT CONVERSATION:
             return self.explain_eligibility(eligibility_context, user_language, session_id)
         
         prompt = build_general_conversation_prompt(user_message, conversation_history, user_language)
-        full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
         
         try:
-            response = self.model.generate_content(full_prompt)
+            response = self.model.generate_content(prompt)
             return self._extract_text(response)
+        except GeminiExtractionError:
+            return "I'm here to help! Could you rephrase your question?"
         except Exception as e:
             return f"I'm here to help! Could you rephrase your question? (Error: {str(e)})"
     
+    def generate_response_stream(
+        self,
+        user_message: str,
+        conversation_history: List[ConversationMessage],
+        eligibility_context: Optional[EligibilityContext] = None,
+        session_id: str = "default"
+    ) -> Iterator[str]:
+        """
+        Stream a general conversational response as Gemini generates it
+        
+        Same prompt as generate_response, but text is yielded chunk by chunk
+        so interactive callers can show the reply while it is generated.
+        
+        Args:
+            user_message: Current user message
+            conversation_history: Conversation history
+            eligibility_context: Optional eligibility data if available
+            session_id: Session identifier
+        
+        Yields:
+            Response text chunks
+        """
+        user_language = self.detect_language(user_message)
+        
+        if eligibility_context:
+            yield from self.explain_eligibility_stream(eligibility_context, user_language)
+            return
+        
+        prompt = build_general_conversation_prompt(user_message, conversation_history, user_language)
+        
+        chunks = []
+        try:
+            for response in self.model.generate_content(prompt, stream=True):
+                text = _chunk_text(response)
+                if text:
+                    chunks.append(text)
+                    yield text
+        except Exception as e:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f"Error in generate_response_stream: {e}", exc_info=True)
+        
+        if not chunks:
+            # Nothing was shown yet (no text, or an error before the first chunk)
+            yield "I'm here to help! Could you rephrase your question?"
+    
     def add_to_history(
         self,
         session_id: str,
         role: str,
         content: str
     ):
-        """Add message to conversation history"""
-        if session_id not in self.conversation_history:
-            self.conversation_history[session_id] = []
+        """
+        Add message to conversation history
         
-        self.conversation_history[session_id].append(
-            ConversationMessage(role=role, content=content)
-        )
+        Keeps the last MAX_HISTORY_MESSAGES per session and the
+        MAX_HISTORY_SESSIONS most recently active sessions.
+        """
+        message = ConversationMessage(role=sys.intern(role), content=content)
+        with self._history_lock:
+            messages = self.conversation_history.get(session_id)
+            if messages is None:
+                messages = self.conversation_history[session_id] = deque(maxlen=MAX_HISTORY_MESSAGES)
+            messages.append(message)  # Drops the oldest message once the session is full
+            
+            self.conversation_history.move_to_end(session_id)
+            while len(self.conversation_history) > MAX_HISTORY_SESSIONS:
+                self.conversation_history.popitem(last=False)
+    
+    def clear_history(self, session_id: str):
+        """Drop conversation history for a session"""
+        with self._history_lock:
+            self.conversation_history.pop(session_id, None)
     
     def get_history(self, session_id: str, limit: int = 10) -> List[ConversationMessage]:
         """Get recent conversation history"""
-        if session_id not in self.conversation_history:
-            return []
+        with self._history_lock:
+            messages = self.conversation_history.get(session_id, ())
+            return list(islice(messages, max(0, len(messages) - limit), None))
+    
+    def iter_history(self, session_id: str, limit: int = 10) -> Iterator[ConversationMessage]:
+        """
+        Iterate recent conversation history in place, without copying it
         
-        return self.conversation_history[session_id][-limit:]
+        Reads the stored messages without _history_lock, so the caller must
+        keep add_to_history for this session from running until it is done
+        with the iterator. The Orchestrator does this by calling it under
+        the session's PipelineContext.lock.
+        """
+        messages = self.conversation_history.get(session_id, ())
+        return islice(messages, max(0, len(messages) - limit), None)
 
 if __name__ == "__main__":
     context = EligibilityContext(
@@ -11,10 +11,121 @@ This module handles:
 
 import re
 import logging
-from typing import Optional, Dict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, List, Tuple
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+NORMALIZE_CACHE_SIZE = 4096  # Distinct (text, language) results kept; chat replies repeat a lot
+
+
+def _compile(pattern: str) -> re.Pattern:
+    """
+    Compile a lookaround-free pattern with RE2 when installed, else with the stdlib engine
+    
+    RE2 matches in linear time with no backtracking. Its \\b and \\s are
+    ASCII-only, so the re fallback is compiled with re.ASCII to match.
+    """
+    if RE2_AVAILABLE:
+        try:
+            return re2.compile(pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern, re.ASCII)
+
+
+# Patterns are compiled once at import instead of looked up in re's cache per call
+_WHITESPACE_RE = re.compile(r'\s+')  # Includes \n and \r, so line breaks collapse too
+
+# Written numbers converted by _normalize_numbers (simple cases only)
+_SIMPLE_NUMBERS = {
+    'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4',
+    'five': '5', 'six': '6', 'seven': '7', 'eight': '8', 'nine': '9',
+    'ten': '10', 'eleven': '11', 'twelve': '12', 'thirteen': '13',
+    'fourteen': '14', 'fifteen': '15', 'sixteen': '16', 'seventeen': '17',
+    'eighteen': '18', 'nineteen': '19', 'twenty': '20', 'thirty': '30',
+    'forty': '40', 'fifty': '50', 'sixty': '60', 'seventy': '70',
+    'eighty': '80', 'ninety': '90'
+}
+# One group per word, longest first, so a match maps back to its digits via
+# lastindex (RE2 folds case beyond ASCII, so "ſix" can match and has no dict key)
+_SIMPLE_NUMBER_WORDS = sorted(_SIMPLE_NUMBERS, key=len, reverse=True)
+_SIMPLE_NUMBER_DIGITS = [_SIMPLE_NUMBERS[word] for word in _SIMPLE_NUMBER_WORDS]
+# A following magnitude word is captured (not looked ahead at) so the pattern
+# stays RE2-compatible; _replace_number_word leaves those matches as they are
+_SIMPLE_NUMBER_RE = _compile(
+    r'(?i)\b(?:' + '|'.join(f'({word})' for word in _SIMPLE_NUMBER_WORDS) + r')\b'
+    r'(\s+(?:thousand|lakh|crore|hundred))?'
+)
+_MAGNITUDE_GROUP = len(_SIMPLE_NUMBER_WORDS) + 1
+
+
+def _replace_number_word(match) -> str:
+    """Digits for a matched number word, unless it is followed by thousand/lakh/crore/hundred"""
+    if match.group(_MAGNITUDE_GROUP) is not None:
+        return match.group(0)
+    return _SIMPLE_NUMBER_DIGITS[match.lastindex - 1]
+
+
+# Currency spellings rewritten to ₹ in a single pass. The number and currency
+# patterns match ASCII words only (re.ASCII), which keeps \b and \w cheap
+# range checks instead of Unicode table lookups
+_CURRENCY_RE = re.compile(
+    r'\bRs\.\s*'  # "Rs. " or "Rs." (word boundary + requires dot)
+    r'|\bRs\s+'  # "Rs " (word boundary + space, ensures not "years")
+    r'|\brupees?\s+'  # "rupee " or "rupees " (word boundary ensures standalone)
+    r'|(?<!\w)rs\.(?!\w)'  # "rs." NOT part of a word (requires dot)
+    r'|(?<!\w)\s+rs\b(?![.\s])'  # " rs" at end of word, unless an "rs."/"rs " branch above takes it
+    r'|\bINR\s+',  # "INR " (word boundary)
+    re.IGNORECASE | re.ASCII
+)
+
+# Superset of what the whitespace, number and currency passes rewrite: odd
+# whitespace, a number word, or a word starting like a currency spelling.
+# Text with no match comes out of those passes unchanged.
+_NEEDS_NORMALIZATION_RE = re.compile(
+    r'[^\S ]|^ | $|  |(?a:\b(?:rs|rupee|inr)|\b(?:' + '|'.join(_SIMPLE_NUMBER_WORDS) + r')\b)',
+    re.IGNORECASE
+)
+
+# Number words and transliteration keys all contain an ASCII letter; text
+# without one (e.g. pure Devanagari) can skip those passes
+_ASCII_LETTER_RE = re.compile(r'[A-Za-z]')
+
+# Basic Hinglish -> Devanagari word mappings
+_TRANSLITERATION_MAP = {
+    'hai': 'है',
+    'main': 'में',
+    'ke': 'के',
+    'ki': 'की',
+    'ka': 'का',
+    'ko': 'को',
+    'se': 'से',
+    'mein': 'में',
+    'hain': 'हैं',
+    'nahi': 'नहीं',
+    'nahin': 'नहीं',
+}
+
+_SPECIAL_CHARS_KEEP_CURRENCY_RE = re.compile(r'[^\w\s₹.,!?]')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s]')
+
+
+@dataclass(frozen=True)
+class NormalizationResult:
+    """Result of NormalizationService.normalize (immutable, so cached results are shared)"""
+    normalized_text: str  # Cleaned and normalized text
+    original_text: str
+    changes_made: Tuple[str, ...] = ()  # Names of the changes applied, in order
+    confidence: float = 1.0
+
 
 class NormalizationService:
     """
@@ -31,25 +142,11 @@ class NormalizationService:
         """Initialize normalization service"""
         logger.info("Normalization Service initialized")
         
-        self.transliteration_map = self._build_transliteration_map()
-    
-    def _build_transliteration_map(self) -> Dict[str, str]:
-        """Build basic transliteration mappings"""
-        return {
-            'hai': 'है',
-            'main': 'में',
-            'ke': 'के',
-            'ki': 'की',
-            'ka': 'का',
-            'ko': 'को',
-            'se': 'से',
-            'mein': 'में',
-            'hain': 'हैं',
-            'nahi': 'नहीं',
-            'nahin': 'नहीं',
-        }
-    
-    def normalize(self, text: str, language: Optional[str] = None) -> Dict[str, any]:
+        self.transliteration_map = _TRANSLITERATION_MAP
+        # Per instance, so the cache is keyed on (text, language) only
+        self._normalize_cached = lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(self._normalize_text)
+    
+    def normalize(self, text: str, language: Optional[str] = None) -> NormalizationResult:
         """
         Normalize text - main entry point
         
@@ -58,39 +155,60 @@ class NormalizationService:
             language: Optional language hint (for transliteration)
         
         Returns:
-            Dictionary with:
-            - normalized_text: Cleaned and normalized text
-            - original_text: Original input
-            - changes_made: List of changes applied
+            NormalizationResult with the normalized text, original text,
+            changes applied and confidence
+        """
+        return self._normalize_cached(text, language)
+    
+    def normalize_many(self, texts: List[str], language: Optional[str] = None) -> List[NormalizationResult]:
+        """
+        Normalize several texts (e.g. a backfill of stored messages)
+        
+        Runs in the calling thread: re holds the GIL while matching, so a
+        thread pool would not speed this up. Repeated texts hit the cache.
+        
+        Args:
+            texts: Input texts to normalize
+            language: Optional language hint applied to every text
+        
+        Returns:
+            One normalize() result per input text, in order
         """
-        original = text
+        normalize = self.normalize
+        return [normalize(text, language) for text in texts]
+    
+    def _normalize_text(self, text: str, language: Optional[str]) -> NormalizationResult:
+        """Run the normalization passes (cached by normalize)"""
         changes = []
         
+        transliterate = bool(language) and language.lower() in ['hindi', 'hi']
+        if not transliterate and _NEEDS_NORMALIZATION_RE.search(text) is None:
+            return NormalizationResult(text, text)
+        
         cleaned = self._clean_text(text)
         if cleaned != text:
             changes.append("cleaned_whitespace")
         
-        normalized = self._normalize_numbers(cleaned)
-        if normalized != cleaned:
+        numbers_normalized = self._normalize_numbers(cleaned)
+        if numbers_normalized != cleaned:
             changes.append("normalized_numbers")
         
-        normalized = self._normalize_currency(normalized)
-        if normalized != cleaned:
+        normalized = self._normalize_currency(numbers_normalized)
+        if normalized != numbers_normalized:
             changes.append("normalized_currency")
         
-        
-        if language and language.lower() in ['hindi', 'hi']:
+        if transliterate:
             transliterated = self._transliterate_to_devanagari(normalized)
             if transliterated != normalized:
                 changes.append("transliterated_to_devanagari")
                 normalized = transliterated
         
-        return {
-            'normalized_text': normalized,
-            'original_text': original,
-            'changes_made': changes,
-            'confidence': 1.0 if not changes else 0.95
-        }
+        return NormalizationResult(
+            normalized_text=normalized,
+            original_text=text,
+            changes_made=tuple(changes),
+            confidence=0.95 if changes else 1.0
+        )
     
     def _clean_text(self, text: str) -> str:
         """
@@ -100,14 +218,7 @@ class NormalizationService:
         - Normalize line breaks
         - Trim leading/trailing spaces
         """
-        text = re.sub(r'\s+', ' ', text)
-        
-        text = re.sub(r'\n+', ' ', text)
-        text = re.sub(r'\r+', ' ', text)
-        
-        text = text.strip()
-        
-        return text
+        return _WHITESPACE_RE.sub(' ', text).strip()
     
     def _normalize_numbers(self, text: str) -> str:
         """
@@ -116,21 +227,9 @@ class NormalizationService:
         Only handles simple cases. Complex cases like "fifty thousand" 
         are better handled by NLU extraction.
         """
-        simple_numbers = {
-            'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4',
-            'five': '5', 'six': '6', 'seven': '7', 'eight': '8', 'nine': '9',
-            'ten': '10', 'eleven': '11', 'twelve': '12', 'thirteen': '13',
-            'fourteen': '14', 'fifteen': '15', 'sixteen': '16', 'seventeen': '17',
-            'eighteen': '18', 'nineteen': '19', 'twenty': '20', 'thirty': '30',
-            'forty': '40', 'fifty': '50', 'sixty': '60', 'seventy': '70',
-            'eighty': '80', 'ninety': '90'
-        }
-        
-        for word, num in simple_numbers.items():
-            pattern = r'\b' + re.escape(word) + r'\b(?!\s+(?:thousand|lakh|crore|hundred))'
-            text = re.sub(pattern, num, text, flags=re.IGNORECASE)
-        
-        return text
+        if _ASCII_LETTER_RE.search(text) is None:
+            return text
+        return _SIMPLE_NUMBER_RE.sub(_replace_number_word, text)
     
     def _normalize_currency(self, text: str) -> str:
         """
@@ -141,19 +240,13 @@ class NormalizationService:
         - "rupees 50000" -> "₹50000"
         - "50000 rs" -> "₹50000"
         """
-        patterns = [
-            (r'\bRs\.\s*', '₹'),  # "Rs. " or "Rs." (word boundary + requires dot)
-            (r'\bRs\s+', '₹'),  # "Rs " (word boundary + space, ensures not "years")
-            (r'\brupees?\s+', '₹'),  # "rupee " or "rupees " (word boundary ensures standalone)
-            (r'(?<!\w)rs\.(?!\w)', '₹'),  # "rs." NOT part of a word (requires dot)
-            (r'(?<!\w)\s+rs\b', '₹'),  # " rs" at end of word (space before, word boundary after)
-            (r'\bINR\s+', '₹'),  # "INR " (word boundary)
-        ]
-        
-        for pattern, replacement in patterns:
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-        
-        return text
+        # Every branch needs one of these substrings; plain `in` checks are far
+        # cheaper than a regex scan for the usual text with no currency in it.
+        # _CURRENCY_RE matches ASCII letters only (re.ASCII), so lower() is enough.
+        lowered = text.lower()
+        if 'rs' not in lowered and 'rupee' not in lowered and 'nr' not in lowered:
+            return text
+        return _CURRENCY_RE.sub('₹', text)
     
     def _transliterate_to_devanagari(self, text: str) -> str:
         """
@@ -165,6 +258,8 @@ class NormalizationService:
         
         This handles common loan-related terms.
         """
+        if _ASCII_LETTER_RE.search(text) is None:
+            return text
         
         words = text.split()
         transliterated_words = []
@@ -186,12 +281,8 @@ class NormalizationService:
             text: Input text
             keep_currency: Keep currency symbols like ₹
         """
-        if keep_currency:
-            pattern = r'[^\w\s₹.,!?]'
-        else:
-            pattern = r'[^\w\s]'
-        
-        return re.sub(pattern, '', text)
+        pattern = _SPECIAL_CHARS_KEEP_CURRENCY_RE if keep_currency else _SPECIAL_CHARS_RE
+        return pattern.sub('', text)
     
     def normalize_for_nlu(self, text: str) -> str:
         """
@@ -199,8 +290,7 @@ class NormalizationService:
         
         This ensures text is in the best format for extraction
         """
-        result = self.normalize(text)
-        return result['normalized_text']
+        return self.normalize(text).normalized_text
 
 
 
@@ -223,8 +313,8 @@ if __name__ == "__main__":
     for test in test_cases:
         result = service.normalize(test)
         print(f"\nOriginal:  '{test}'")
-        print(f"Normalized: '{result['normalized_text']}'")
-        print(f"Changes:   {result['changes_made']}")
+        print(f"Normalized: '{result.normalized_text}'")
+        print(f"Changes:   {list(result.changes_made)}")
     
     print("\n" + "=" * 60)
     print("✅ Normalization Service ready!")
@@ -18,14 +18,18 @@ Features:
 """
 
 import logging
+import re
+import threading
 import time
+from collections import OrderedDict
 from typing import Dict, Optional, List, Any, Tuple
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from datetime import datetime
 import traceback
 
 from llm_service import LLMService, ConversationMessage, EligibilityContext
+from nlu_service import extract_financial_data
 from rule_engine import (
     UserFinancialProfile,
     LoanType,
@@ -45,6 +49,14 @@ except ImportError:
     STT_AVAILABLE = False
     logger.warning("STT service not available - install stt_service.py")
 
+# Profile attributes NLU results may update (looked up per extracted key)
+_PROFILE_FIELDS = frozenset(f.name for f in fields(UserFinancialProfile))
+
+# Keywords showing the assistant already asked about a topic (case-insensitive,
+# so history messages are searched as stored instead of lowercased per check)
+_EMPLOYMENT_TOPIC_RE = re.compile(r"salaried|self-employed|employment", re.IGNORECASE)
+_DEBT_TOPIC_RE = re.compile(r"existing|loan|debt", re.IGNORECASE)
+
 
 class ComponentStatus(str, Enum):
     """Status of each component"""
@@ -90,6 +102,9 @@ class PipelineContext:
     component_results: Dict[PipelineStage, ComponentResult] = field(default_factory=dict)
     metadata: Dict = field(default_factory=dict)
     start_time: float = field(default_factory=time.time)
+    detected_language: Optional[str] = None  # Sticky once a non-English language is seen
+    last_active: float = field(default_factory=time.time)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)  # Held for a whole process_request run
 
 
 class Orchestrator:
@@ -104,7 +119,9 @@ class Orchestrator:
         max_retries: int = 3,
         confidence_threshold: float = 0.7,
         enable_ocr: bool = False,
-        enable_stt: bool = True
+        enable_stt: bool = True,
+        max_sessions: int = 10000,
+        session_ttl_seconds: float = 1800
     ):
         """
         Initialize orchestrator
@@ -116,6 +133,8 @@ class Orchestrator:
             confidence_threshold: Minimum confidence for accepting results
             enable_ocr: Enable OCR processing
             enable_stt: Enable Speech-to-Text processing
+            max_sessions: Maximum sessions kept in memory (least recently used evicted)
+            session_ttl_seconds: Idle time after which a session is evicted
         """
         self.llm_service = llm_service or LLMService()
         self.max_retries = max_retries
@@ -134,7 +153,11 @@ class Orchestrator:
         else:
             self.stt_service = None
         
-        self.sessions: Dict[str, PipelineContext] = {}
+        # Bounded LRU + idle TTL store - a public API must not grow sessions without limit
+        self.max_sessions = max_sessions
+        self.session_ttl_seconds = session_ttl_seconds
+        self.sessions: "OrderedDict[str, PipelineContext]" = OrderedDict()
+        self._sessions_lock = threading.RLock()
         
         # Define the order of questions to ask
         self.question_order = [
@@ -172,50 +195,101 @@ class Orchestrator:
             Complete response with all pipeline results
         """
         context = self._get_or_create_context(session_id)
-        context.user_input = user_input
-        context.metadata["user_language"] = user_language
-        context.metadata["has_audio"] = audio_data is not None
-        context.metadata["has_document"] = document_data is not None
         
-        logger.info(f"Processing request for session {session_id}: {user_input[:50]}...")
-        
-        try:
-            if self.enable_stt and audio_data:
-                context = self._run_stt(context, audio_data)
+        # The stages all write this context, so one session's turns run one at a
+        # time; different sessions still run in parallel on the threadpool
+        with context.lock:
+            context.user_input = user_input
+            context.metadata["user_language"] = user_language
+            context.metadata["has_audio"] = audio_data is not None
+            context.metadata["has_document"] = document_data is not None
             
-            context = self._run_normalization(context)
+            logger.info(f"Processing request for session {session_id}: {user_input[:50]}...")
             
-            context = self._run_nlu(context)
+            try:
+                if self.enable_stt and audio_data:
+                    context = self._run_stt(context, audio_data)
             
-            context = self._run_rules_engine(context)
+                context = self._run_normalization(context)
             
-            if self.enable_ocr and document_data:
-                context = self._run_ocr(context, document_data)
+                context = self._run_nlu(context)
             
-            context = self._run_llm(context, user_language)
+                context = self._run_rules_engine(context)
             
-            context = self._run_db_audit(context)
+                if self.enable_ocr and document_data:
+                    context = self._run_ocr(context, document_data)
             
-            return self._build_response(context)
+                context = self._run_llm(context, user_language)
             
-        except Exception as e:
-            logger.error(f"Pipeline error: {str(e)}\n{traceback.format_exc()}")
-            return self._build_error_response(context, str(e))
+                context = self._run_db_audit(context)
+            
+                return self._build_response(context)
+            
+            except Exception as e:
+                logger.error(f"Pipeline error: {str(e)}\n{traceback.format_exc()}")
+                return self._build_error_response(context, str(e))
     
     def _get_or_create_context(self, session_id: str) -> PipelineContext:
         """Get existing context or create new one"""
-        is_new_session = session_id not in self.sessions
-        if is_new_session:
-            self.sessions[session_id] = PipelineContext(session_id=session_id, user_input="")
-            self.sessions[session_id].metadata["is_new_session"] = True
-        return self.sessions[session_id]
+        now = time.time()
+        with self._sessions_lock:
+            context = self.sessions.get(session_id)
+            if context is not None and now - context.last_active > self.session_ttl_seconds:
+                self._evict_session(session_id)
+                context = None
+            
+            if context is None:
+                context = PipelineContext(session_id=session_id, user_input="")
+                context.metadata["is_new_session"] = True
+                self.sessions[session_id] = context
+                self._evict_stale_sessions(now)
+            else:
+                self.sessions.move_to_end(session_id)
+            
+            context.last_active = now
+            return context
+    
+    def _evict_stale_sessions(self, now: float):
+        """Evict least recently used sessions that are idle too long or over capacity"""
+        while self.sessions:
+            oldest_id, oldest = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.max_sessions and now - oldest.last_active <= self.session_ttl_seconds:
+                break
+            self._evict_session(oldest_id)
+    
+    def _evict_session(self, session_id: str):
+        """Drop a session and its conversation history"""
+        self.sessions.pop(session_id, None)
+        self.llm_service.clear_history(session_id)
+        logger.info(f"Evicted session {session_id}")
+    
+    def _session_language(self, context: PipelineContext) -> str:
+        """
+        Language detected for the session, cached on the context
+        
+        Detection only finds positive evidence (Hindi/Tamil words), so an
+        "english" result is re-checked each turn while a detected Indic
+        language is kept for the rest of the session.
+        """
+        if context.detected_language in (None, "english"):
+            context.detected_language = self.llm_service.detect_language(context.user_input)
+        return context.detected_language
     
     def _is_new_session(self, context: PipelineContext) -> bool:
         """Check if this is a new session (first message)"""
-        history = self.llm_service.get_history(context.session_id, limit=100)
         # New session if no assistant messages yet (or only one user message)
-        assistant_messages = [msg for msg in history if msg.role == "assistant"]
-        return len(assistant_messages) == 0
+        return not any(
+            msg.role == "assistant"
+            for msg in self.llm_service.iter_history(context.session_id, limit=100)
+        )
+    
+    def _assistant_mentioned(self, context: PipelineContext, topic: re.Pattern) -> bool:
+        """Check if a recent assistant message mentions a topic"""
+        return any(
+            topic.search(msg.content)
+            for msg in self.llm_service.iter_history(context.session_id, limit=20)
+            if msg.role == "assistant"
+        )
     
     def _get_next_question(self, context: PipelineContext) -> Optional[str]:
         """
@@ -261,11 +335,7 @@ class Orchestrator:
         if profile and profile.monthly_income and profile.monthly_income > 0:
             # Have income - check if we know employment status
             # Check history to see if we've asked about employment status
-            history = self.llm_service.get_history(context.session_id, limit=20)
-            asked_about_employment = any(
-                "salaried" in msg.content.lower() or "self-employed" in msg.content.lower() or "employment" in msg.content.lower()
-                for msg in history if msg.role == "assistant"
-            )
+            asked_about_employment = self._assistant_mentioned(context, _EMPLOYMENT_TOPIC_RE)
             if not asked_about_employment:
                 return "employment status"
             # If asked but no employment_months, we still need it
@@ -279,11 +349,7 @@ class Orchestrator:
         )
         # We need to explicitly ask if they have existing debts (even if 0, we should confirm)
         # Check if we've asked about this before
-        history = self.llm_service.get_history(context.session_id, limit=20)
-        asked_about_debts = any(
-            "existing" in msg.content.lower() or "loan" in msg.content.lower() or "debt" in msg.content.lower()
-            for msg in history if msg.role == "assistant"
-        )
+        asked_about_debts = self._assistant_mentioned(context, _DEBT_TOPIC_RE)
         if not asked_about_debts:
             return "existing debts"
         
@@ -380,16 +446,16 @@ class Orchestrator:
                 language=user_lang
             )
             
-            normalized_text = normalization_result['normalized_text']
-            changes_made = normalization_result.get('changes_made', [])
+            normalized_text = normalization_result.normalized_text
+            changes_made = list(normalization_result.changes_made)
             
             result.status = ComponentStatus.SUCCESS
             result.data = {
                 "normalized_text": normalized_text,
-                "original_text": normalization_result['original_text'],
+                "original_text": normalization_result.original_text,
                 "changes_made": changes_made
             }
-            result.confidence = normalization_result.get('confidence', 1.0)
+            result.confidence = normalization_result.confidence
             context.user_input = normalized_text
             
             if changes_made:
@@ -416,16 +482,14 @@ class Orchestrator:
             result.status = ComponentStatus.RUNNING
             logger.info(f"[NLU] Extracting data for session {context.session_id}")
             
-            from api_endpoint import extract_financial_data
-            
             existing_profile = context.user_profile
             logger.info(f"[NLU] Calling extract_financial_data with profile: income={existing_profile.monthly_income if existing_profile else 'None'}, employment={existing_profile.employment_months if existing_profile else 'None'}")
             extraction_result = extract_financial_data(context.user_input, existing_profile)
             logger.info(f"[NLU] Extraction returned: {extraction_result}")
             
-            extracted = extraction_result.get("extracted", {})
-            missing = extraction_result.get("missing", [])
-            intent = extraction_result.get("intent", "provide_info")
+            extracted = extraction_result.extracted
+            missing = extraction_result.missing
+            intent = extraction_result.intent
             
             logger.info(f"[NLU] Extraction result - extracted: {extracted}, missing: {missing}")
             
@@ -450,8 +514,7 @@ class Orchestrator:
                     logger.info(f"[NLU] Updating existing profile. Extracted keys: {list(extracted.keys())}")
                     for key, value in extracted.items():
                         logger.info(f"[NLU] Processing key: {key}, value: {value}, type: {type(value)}")
-                        if hasattr(context.user_profile, key):
-                            logger.info(f"[NLU] Profile has attribute {key}")
+                        if key in _PROFILE_FIELDS:
                             if key == "loan_type" and value:
                                 context.user_profile.loan_type = value
                             elif key == "loan_tenure_years":
@@ -566,10 +629,10 @@ class Orchestrator:
             result.status = ComponentStatus.RUNNING
             logger.info(f"[LLM] Generating response for session {context.session_id}")
             
-            history = self.llm_service.get_history(context.session_id, limit=10)
             self.llm_service.add_to_history(context.session_id, "user", context.user_input)
             history = self.llm_service.get_history(context.session_id, limit=10)
             context.conversation_history = history
+            lang = user_language or self._session_language(context)
             
             # Check if we have eligibility result - if yes, explain it
             # Determine next question in the sequence
@@ -602,12 +665,10 @@ class Orchestrator:
                         "monthly_income": context.user_profile.monthly_income if context.user_profile else 0,
                         "age": context.user_profile.age if context.user_profile else 0,
                         "employment_months": context.user_profile.employment_months if context.user_profile else 0
-                    }
+                    },
+                    tenure_was_provided=tenure_was_provided
                 )
                 
-                eligibility_context.tenure_was_provided = tenure_was_provided
-                
-                lang = user_language or self.llm_service.detect_language(context.user_input)
                 response = self.llm_service.explain_eligibility(
                     eligibility_context,
                     lang,
@@ -615,8 +676,6 @@ class Orchestrator:
                 )
             else:
                 # Use sequential question flow (we already computed next_question above)
-                lang = user_language or self.llm_service.detect_language(context.user_input)
-                
                 if next_question == "greeting":
                     response = self.llm_service.ask_greeting(lang, context.session_id)
                 elif next_question == "loan amount":
@@ -35,18 +35,21 @@ def main():
             llm.add_to_history(session_id, "user", user_input)
             history = llm.get_history(session_id, limit=10)
 
-            # Generate response (general conversation only)
-            response = llm.generate_response(
+            # Generate response (general conversation only), printed as it streams in
+            print("Bot: ", end="", flush=True)
+            chunks = []
+            for chunk in llm.generate_response_stream(
                 user_message=user_input,
                 conversation_history=history,
                 eligibility_context=None,
                 session_id=session_id,
-            )
+            ):
+                chunks.append(chunk)
+                print(chunk, end="", flush=True)
+            print("\n")
 
             # Add bot response to history
-            llm.add_to_history(session_id, "assistant", response)
-
-            print(f"Bot: {response}\n")
+            llm.add_to_history(session_id, "assistant", "".join(chunks).strip())
     except KeyboardInterrupt:
         print("\nBot: Goodbye!")
         sys.exit(0)
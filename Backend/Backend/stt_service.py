@@ -13,6 +13,7 @@ Features:
 
 import os
 import logging
+import threading
 from typing import Optional
 from pathlib import Path
 import tempfile
@@ -70,6 +71,9 @@ class STTService:
         
         self.model_name = model_name
         self.model = None
+        # Whisper's decoder installs kv-cache hooks on the shared model for each
+        # decode, so two transcriptions at once corrupt each other's caches
+        self._model_lock = threading.Lock()
         
         logger.info(f"Loading Whisper model: {model_name} (this may take a moment on first run)...")
         try:
@@ -120,12 +124,13 @@ class STTService:
                 tmp_file_path = tmp_file.name
             
             try:
-                result = self.model.transcribe(
-                    tmp_file_path,
-                    language=language,
-                    initial_prompt=prompt,
-                    verbose=False
-                )
+                with self._model_lock:
+                    result = self.model.transcribe(
+                        tmp_file_path,
+                        language=language,
+                        initial_prompt=prompt,
+                        verbose=False
+                    )
                 
                 transcribed_text = result.get('text', '').strip()
                 detected_language = result.get('language', 'unknown')
@@ -179,12 +184,13 @@ class STTService:
         try:
             logger.info(f"Transcribing file: {file_path}")
             
-            result = self.model.transcribe(
-                file_path,
-                language=language,
-                initial_prompt=prompt,
-                verbose=False
-            )
+            with self._model_lock:
+                result = self.model.transcribe(
+                    file_path,
+                    language=language,
+                    initial_prompt=prompt,
+                    verbose=False
+                )
             
             transcribed_text = result.get('text', '').strip()
             detected_language = result.get('language', 'unknown')